@@ -1,15 +1,316 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Dict, Optional, Union
 from pathlib import Path
 from pkg_resources import resource_filename
 
+import copy
+import functools
+import gzip
+import importlib
 import importlib.resources
 import logging
+import os
 import shutil
 
 from nrel.routee.compass.io.utils import add_grade_to_graph
 
 log = logging.getLogger(__name__)
 
+# gzip level 1 is much faster than the default level 9 for a small size
+# penalty, and a fixed mtime keeps the outputs reproducible
+GZ_FAST = {"method": "gzip", "compresslevel": 1, "mtime": 0}
+
+# rows formatted and written per block, bounding the memory spent on text
+# buffers for continental-scale graphs
+CHUNK_ROWS = 200_000
+
+# below this many edges, outputs are left uncompressed by default: gzip
+# time dominates for small graphs and saves only a few kilobytes
+COMPRESS_MIN_EDGES = 200_000
+
+# OSM edge attributes already written as typed or renamed edge columns,
+# which are left out when carrying the remaining attributes over
+EDGE_ATTRIBUTES_WRITTEN = (
+    "osmid",
+    "length",
+    "speed_kph",
+    "highway",
+    "bearing",
+    "geometry",
+)
+
+# concurrent file writers. the edge geometry file is by far the largest
+# output and the last to finish, so it alone is compressed on every core;
+# the other files are small enough that one thread each is not the bottleneck
+WRITE_WORKERS = min(os.cpu_count() or 1, 8)
+GEOMETRY_COMPRESS_THREADS = os.cpu_count() or 1
+
+TABLE_FORMATS = {"csv": ".csv", "feather": ".feather", "parquet": ".parquet"}
+
+CONFIG_TEMPLATES = (
+    "osm_default_distance.toml",
+    "osm_default_speed.toml",
+    "osm_default_energy.toml",
+)
+
+# numpy and pandas are cheap to import and are used throughout, so they are
+# imported once here. the heavier optional dependencies (osmnx, geopandas,
+# shapely, pyarrow, mgzip) are imported on first use by _optional_import so
+# that importing the package stays cheap.
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = pd = None  # type: ignore
+
+try:
+    import toml as _toml
+except ImportError:
+    try:
+        import tomllib as _toml  # type: ignore
+    except ImportError:
+        _toml = None  # type: ignore
+
+
+@functools.lru_cache(maxsize=None)
+def _optional_import(name: str):
+    """
+    imports an optional dependency once per process, returning None when
+    it is not installed.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _load_config_template(filename: str) -> dict:
+    """
+    parses a default configuration template from the package resources,
+    once per process. callers deep-copy the result before modifying it.
+    """
+    init_toml_file = resource_filename("nrel.routee.compass.resources", filename)
+    with open(init_toml_file, "r") as f:
+        return _toml.loads(f.read())
+
+
+def _write_table(
+    df, output_directory: Path, name: str, table_format: str, compress: bool
+):
+    """
+    writes a table to the output directory in the requested file format.
+    object columns holding a mix of scalars and lists (common for OSM
+    attributes on simplified edges) are written as their string
+    representation, matching the CSV output, since Arrow requires a
+    single type per column.
+    """
+    path = output_directory / f"{name}{TABLE_FORMATS[table_format]}"
+    if table_format == "csv":
+        if compress:
+            path = path.with_suffix(".csv.gz")
+        df.to_csv(
+            path,
+            index=False,
+            compression=GZ_FAST if compress else None,
+            chunksize=CHUNK_ROWS,
+        )
+        return
+
+    mixed_cols = {
+        col: df[col].where(df[col].isna(), df[col].astype(str))
+        for col in df.columns
+        if col != "geometry" and df[col].dtype == object
+    }
+    df = df.assign(**mixed_cols).reset_index(drop=True)
+    if table_format == "feather":
+        df.to_feather(path, compression="zstd", compression_level=3, chunksize=65536)
+    else:
+        df.to_parquet(path, index=False, compression="snappy")
+
+
+def _remaining_attributes(records, written):
+    """
+    collects the attributes of a list of node or edge attribute dicts that
+    are not in `written`, as one list per attribute in the order they are
+    first seen. as in ox.graph_to_gdfs, a record without an attribute gets
+    NaN for it.
+    """
+    keys: Dict[str, None] = {}
+    for d in records:
+        keys.update(dict.fromkeys(d))
+    return {k: [d.get(k, np.nan) for d in records] for k in keys if k not in written}
+
+
+def _open_output(path: Path, threads: int = 1):
+    """
+    opens an output file for binary writing, gzip compressed when the
+    path ends in .gz. with more than one thread, compression uses the
+    multi-threaded mgzip package when it is installed, falling back to the
+    standard library. mgzip writes one gzip member per block, which any
+    multi-member gzip reader (including RouteE Compass) decodes as a
+    single stream.
+    """
+    if path.suffix != ".gz":
+        return open(path, "wb")
+    mgzip = _optional_import("mgzip") if threads > 1 else None
+    if mgzip is None:
+        return gzip.GzipFile(
+            path, "wb", compresslevel=GZ_FAST["compresslevel"], mtime=GZ_FAST["mtime"]
+        )
+    return mgzip.MultiGzipFile(
+        path,
+        "wb",
+        compresslevel=GZ_FAST["compresslevel"],
+        mtime=GZ_FAST["mtime"],
+        thread=threads,
+        blocksize=10**7,
+    )
+
+
+def _write_lines(path: Path, chunks, threads: int = 1):
+    """
+    writes each chunk of preformatted lines to a text file, one
+    write call per chunk, compressing on the given number of threads.
+    """
+    with _open_output(path, threads) as f:
+        for lines in chunks:
+            if len(lines) > 0:
+                f.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def _write_enumerated(path: Path, series):
+    """
+    writes one value per line, without a header, to a text file.
+    integer and float64 columns are formatted from their numpy buffer and
+    categorical columns by formatting each category once, and either is
+    written in blocks of CHUNK_ROWS lines. other columns go through the
+    pandas CSV writer. the output matches pandas' to_csv in every case,
+    including quoting, shortest round-trip floats and '""' for missing
+    values.
+    """
+    missing = '""'
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories.to_series()
+        # code -1 marks a missing value, which selects the trailing label
+        labels = np.array(
+            categories.to_csv(index=False, header=False).splitlines() + [missing],
+            dtype=object,
+        )
+        codes = series.cat.codes.to_numpy()
+        chunks = (
+            labels[codes[i : i + CHUNK_ROWS]] for i in range(0, len(codes), CHUNK_ROWS)
+        )
+    elif isinstance(series.dtype, np.dtype) and (
+        series.dtype.kind in "biu" or series.dtype == np.float64
+    ):
+
+        def format_values(values):
+            lines = list(map(str, values.tolist()))
+            if values.dtype == np.float64:
+                for i in np.flatnonzero(np.isnan(values)):
+                    lines[i] = missing
+            return lines
+
+        values = series.to_numpy()
+        chunks = (
+            format_values(values[i : i + CHUNK_ROWS])
+            for i in range(0, len(values), CHUNK_ROWS)
+        )
+    else:
+        with _open_output(path) as f:
+            series.to_csv(f, mode="wb", index=False, header=False, chunksize=CHUNK_ROWS)
+        return
+
+    _write_lines(path, chunks)
+
+
+def _write_geometries(path: Path, geometry):
+    """
+    writes one WKT geometry per line to a text file. the WKT is
+    built with vectorized shapely calls, one block of CHUNK_ROWS
+    geometries at a time, with full coordinate precision and without
+    quoting the LINESTRINGs. as the largest output, it is compressed on
+    GEOMETRY_COMPRESS_THREADS threads.
+    """
+    shapely = _optional_import("shapely")
+    geometry = np.asarray(geometry)
+    chunks = (
+        shapely.to_wkt(geometry[i : i + CHUNK_ROWS], rounding_precision=-1)
+        for i in range(0, len(geometry), CHUNK_ROWS)
+    )
+    _write_lines(path, chunks, GEOMETRY_COMPRESS_THREADS)
+
+
+def _resolve_compress(compress: Optional[bool], n_edges: int) -> bool:
+    """
+    decides whether the CSV and text outputs are gzipped. an explicit
+    choice is kept, and None compresses only graphs with more than
+    COMPRESS_MIN_EDGES edges.
+    """
+    if compress is None:
+        return n_edges > COMPRESS_MIN_EDGES
+    return compress
+
+
+def _drop_gz_suffix(value, key: Optional[str] = None):
+    """
+    returns a copy of a parsed configuration with the .gz suffix removed
+    from every file name, for datasets written without compression. only
+    the values of keys ending in "_file" are file names, so other strings
+    are left as they are.
+    """
+    if isinstance(value, dict):
+        return {k: _drop_gz_suffix(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_drop_gz_suffix(v, key) for v in value]
+    if (
+        isinstance(value, str)
+        and key is not None
+        and key.endswith("_file")
+        and value.endswith(".gz")
+    ):
+        return value[: -len(".gz")]
+    return value
+
+
+def _copy_file(src: Path, dst: Path):
+    """
+    copies a file's contents without passing them through userspace.
+    on Linux, os.copy_file_range copies in-kernel and can reflink on
+    copy-on-write filesystems. elsewhere, or if the call is unsupported,
+    falls back to shutil.copyfile, which itself uses os.sendfile on Linux
+    and fcopyfile on macOS.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                return
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+
+
+def _copy_models(model_output_directory: Path):
+    """
+    copies the RouteE Powertrain model catalog into the output directory.
+    """
+    model_directory = importlib.resources.files("nrel.routee.compass.resources.models")
+    for model_file in model_directory.iterdir():
+        if not model_file.name.endswith(".bin"):
+            continue
+        if model_file.is_file():
+            with importlib.resources.as_file(model_file) as model_path:
+                model_dst = model_output_directory / model_path.name
+                _copy_file(model_path, model_dst)
+
 
 def generate_compass_dataset(
     g,
@@ -19,7 +320,10 @@ def generate_compass_dataset(
     agg: Optional[Callable] = None,
     add_grade: bool = False,
     raster_resolution_arc_seconds: Union[str, int] = 1,
-    default_config: bool = True,
+    default_config: Optional[bool] = None,
+    table_format: str = "feather",
+    legacy_outputs: bool = True,
+    compress: Optional[bool] = None,
 ):
     """
     Processes a graph downloaded via OSMNx, generating the set of input
@@ -43,7 +347,21 @@ def generate_compass_dataset(
             numpy.median, numpy.nanmedian, or your own custom function. Defaults to numpy.mean.
         add_grade (bool, optional): If true, add grade information. Defaults to False. See add_grade_to_graph() for more info.
         raster_resolution_arc_seconds (str, optional): If grade is added, the resolution (in arc-seconds) of the tiles to download (either 1 or 1/3). Defaults to 1.
-        default_config (bool, optional): If true, copy default configuration files into the output directory. Defaults to True.
+        default_config (Optional[bool], optional): If true, copy default configuration files into the output directory.
+            The default configurations read the legacy outputs, so this requires legacy_outputs. If None, follows
+            legacy_outputs. Defaults to None.
+        table_format (str, optional): File format for the vertices-complete and edges-complete tables, one of "feather" (zstd),
+            "parquet" (snappy) or "csv". The feather and parquet formats require pyarrow, and fall back to csv
+            with a warning when it is not installed. The tables read by
+            RouteE Compass are always written as CSV. Defaults to "feather".
+        legacy_outputs (bool, optional): If true, also write the compass, mapping and enumerated CSV/text files
+            that RouteE Compass reads. If false, only the complete tables are written, which together hold the
+            vertex and edge ids, uuids and every OSM attribute (geometries as WKB, or WKT for csv). Defaults to True.
+        compress (Optional[bool], optional): If true, gzip the CSV and text outputs (adding a .gz suffix). If None,
+            they are compressed only when the graph has more than 200,000 edges. Note that this changes the
+            default file names for smaller graphs, which are written without the .gz suffix (for example
+            edges-compass.csv instead of edges-compass.csv.gz), and the copied default configurations refer to
+            those names. Pass compress=True to keep the .gz names. Defaults to None.
         energy_model (str, optional): Which trained RouteE Powertrain should we use? Defaults to "2016_TOYOTA_Camry_4cyl_2WD".
 
     Example:
@@ -51,21 +369,37 @@ def generate_compass_dataset(
         >>> g = ox.graph_from_place("Denver, Colorado, USA")
         >>> generate_compass_dataset(g, Path("denver_co"))
     """
-    try:
-        import osmnx as ox
-        import numpy as np
-    except ImportError:
-        raise ImportError("requires osmnx to be installed. " "Try 'pip install osmnx'")
+    ox = _optional_import("osmnx")
+    gpd = _optional_import("geopandas")
+    shapely = _optional_import("shapely")
+    if ox is None or gpd is None or shapely is None:
+        raise ImportError(
+            "requires osmnx to be installed. "
+            "Try 'pip install \"nrel.routee.compass[osm]\"' or 'pip install osmnx'"
+        )
+    if _toml is None:
+        raise ImportError(
+            "requires Python 3.11 tomllib or pip install toml for earier Python versions"
+        )
 
-    try:
-        import toml
-    except ImportError:
-        try:
-            import tomllib as toml  # type: ignore
-        except ImportError:
-            raise ImportError(
-                "requires Python 3.11 tomllib or pip install toml for earier Python versions"
-            )
+    if default_config is None:
+        default_config = legacy_outputs
+    elif default_config and not legacy_outputs:
+        raise ValueError(
+            "default_config requires legacy_outputs, as the default configuration "
+            "reads the legacy CSV and text files"
+        )
+    if table_format not in TABLE_FORMATS:
+        raise ValueError(
+            f"invalid table format {table_format}. Must be one of: {', '.join(TABLE_FORMATS)}"
+        )
+    if table_format != "csv" and _optional_import("pyarrow") is None:
+        log.warning(
+            f"writing {table_format} files requires pyarrow, which is not installed. "
+            "Writing the complete tables as csv instead. Try "
+            "'pip install \"nrel.routee.compass[osm]\"' or 'pip install pyarrow'"
+        )
+        table_format = "csv"
 
     output_directory = Path(output_directory)
 
@@ -84,128 +418,291 @@ def generate_compass_dataset(
             g1, resolution_arc_seconds=raster_resolution_arc_seconds
         )
 
-    v, e = ox.graph_to_gdfs(g1)
-
+    # the vertex and edge tables are built directly from the graph instead of
+    # with ox.graph_to_gdfs. the columns read by RouteE Compass are built as
+    # typed arrays, and every remaining OSM attribute is carried into the
+    # complete tables as-is.
     # process vertices
     print("processing vertices")
-    v = v.reset_index(drop=False).rename(columns={"osmid": "vertex_uuid"})
-    v["vertex_id"] = range(len(v))
+    n_vertices = g1.number_of_nodes()
+    vertex_x = np.fromiter(
+        (x for _, x in g1.nodes(data="x")), dtype=np.float64, count=n_vertices
+    )
+    vertex_y = np.fromiter(
+        (y for _, y in g1.nodes(data="y")), dtype=np.float64, count=n_vertices
+    )
+    # OSM node ids are integers, which are stored as int64 and joined below
+    # with a binary search. any other hashable node ids are kept as objects.
+    vertex_uuid = np.fromiter(g1.nodes, dtype=object, count=n_vertices)
+    integral_uuids = pd.api.types.infer_dtype(vertex_uuid) == "integer"
+    uuid_dtype = np.int64 if integral_uuids else object
+    if integral_uuids:
+        vertex_uuid = vertex_uuid.astype(np.int64)
+    v = gpd.GeoDataFrame(
+        {
+            "vertex_id": np.arange(n_vertices, dtype=np.int32),
+            "vertex_uuid": vertex_uuid,
+            "x": vertex_x,
+            "y": vertex_y,
+            **_remaining_attributes([d for _, d in g1.nodes(data=True)], ("x", "y")),
+            "geometry": shapely.points(vertex_x, vertex_y),
+        },
+        geometry="geometry",
+        crs=g1.graph["crs"],
+        copy=False,
+    )
 
     # process edges
     print("processing edges")
-    lookup = v.set_index("vertex_uuid")
-
-    def replace_id(vertex_uuid):
-        return lookup.loc[vertex_uuid].vertex_id
-
-    e = e.reset_index(drop=False).rename(
-        columns={
-            "u": "src_vertex_uuid",
-            "v": "dst_vertex_uuid",
-            "osmid": "edge_uuid",
-            "length": "distance",
-        }
-    )
-    e = e[e["key"] == 0]  # take the first entry regardless of what it is (is this ok?)
-    e["edge_id"] = range(len(e))
-    e["src_vertex_id"] = e.src_vertex_uuid.apply(replace_id)
-    e["dst_vertex_id"] = e.dst_vertex_uuid.apply(replace_id)
+    # take the first entry regardless of what it is (is this ok?). parallel
+    # edges are dropped here so they never enter the tables below.
+    edges = [edge for edge in g1.edges(keys=True, data=True) if edge[2] == 0]
+    n_edges = len(edges)
 
-    # WRITE NETWORK FILES
-    output_directory.mkdir(parents=True, exist_ok=True)
-    #   vertex tables
-    print("writing vertex files")
-    v.to_csv(output_directory / "vertices-complete.csv.gz", index=False)
-    v[["vertex_id", "vertex_uuid"]].to_csv(
-        output_directory / "vertices-mapping.csv.gz", index=False
-    )
-    v[["vertex_uuid"]].to_csv(
-        output_directory / "vertices-uuid-enumerated.txt.gz", index=False, header=False
+    # every column is built as an array first so that the edge table is
+    # constructed exactly once, without copying, instead of being copied
+    # each time a derived column is added.
+    src_vertex_uuid = np.fromiter(
+        (src for src, _, _, _ in edges), dtype=uuid_dtype, count=n_edges
     )
-    v[["vertex_id", "x", "y"]].to_csv(
-        output_directory / "vertices-compass.csv.gz", index=False
+    dst_vertex_uuid = np.fromiter(
+        (dst for _, dst, _, _ in edges), dtype=uuid_dtype, count=n_edges
     )
 
-    #   edge tables (CSV)
-    print("writing edge files")
-    compass_cols = ["edge_id", "src_vertex_id", "dst_vertex_id", "distance"]
-    e.to_csv(output_directory / "edges-complete.csv.gz", index=False)
-    e[compass_cols].to_csv(output_directory / "edges-compass.csv.gz", index=False)
-    e[["edge_id", "edge_uuid"]].to_csv(
-        output_directory / "edges-mapping.csv.gz", index=False
-    )
+    # vertex ids are row positions, so for integer uuids the uuid -> id join
+    # is a binary search over the sorted vertex uuids, and otherwise a hash
+    # lookup. every edge endpoint is a vertex of g1.
+    if integral_uuids:
+        uuid_order = np.argsort(vertex_uuid).astype(np.int32)
+        sorted_uuids = vertex_uuid[uuid_order]
+        src_vertex_id = uuid_order[np.searchsorted(sorted_uuids, src_vertex_uuid)]
+        dst_vertex_id = uuid_order[np.searchsorted(sorted_uuids, dst_vertex_uuid)]
+    else:
+        uuid_index = pd.Index(vertex_uuid, dtype=object, tupleize_cols=False)
+        src_vertex_id = uuid_index.get_indexer(src_vertex_uuid).astype(np.int32)
+        dst_vertex_id = uuid_index.get_indexer(dst_vertex_uuid).astype(np.int32)
 
-    #   edge tables (TXT)
-    print("writing edge attribute files")
-    e.edge_uuid.to_csv(
-        output_directory / "edges-uuid-enumerated.txt.gz", index=False, header=False
-    )
-    np.savetxt(
-        output_directory / "edges-geometries-enumerated.txt.gz", e.geometry, fmt="%s"
-    )  # doesn't quote LINESTRINGS
-    e.speed_kph.to_csv(
-        output_directory / "edges-posted-speed-enumerated.txt.gz",
-        index=False,
-        header=False,
-    )
-    e.highway.to_csv(
-        output_directory / "edges-road-class-enumerated.txt.gz",
-        index=False,
-        header=False,
+    # as in ox.graph_to_gdfs, edges without a geometry get a straight line
+    # between their endpoints
+    geometry = np.empty(n_edges, dtype=object)
+    geometry[:] = [d.get("geometry") for _, _, _, d in edges]
+    missing = pd.isna(geometry)
+    coords = v[["x", "y"]].to_numpy()
+    geometry[missing] = shapely.linestrings(
+        np.stack(
+            [coords[src_vertex_id[missing]], coords[dst_vertex_id[missing]]], axis=1
+        )
     )
 
-    headings = e.bearing.fillna(0).apply(lambda x: int(round(x)))
-    headings_df = headings.to_frame(name="arrival_heading")
-
-    # We could get more sophisticated and compute the end heading
-    # for links that might have some significant curvature, but
-    # for now we'll just use the start heading.
-    headings_df["departure_heading"] = None
-    headings_df.to_csv(
-        output_directory / "edges-headings-enumerated.csv.gz",
-        index=False,
-        compression="gzip",
+    columns = {
+        "edge_id": np.arange(n_edges, dtype=np.int32),
+        "src_vertex_id": src_vertex_id,
+        "dst_vertex_id": dst_vertex_id,
+        "src_vertex_uuid": src_vertex_uuid,
+        "dst_vertex_uuid": dst_vertex_uuid,
+        "key": np.zeros(n_edges, dtype=np.int64),
+        "edge_uuid": [d["osmid"] for _, _, _, d in edges],
+        "distance": np.fromiter(
+            (d["length"] for _, _, _, d in edges), dtype=np.float64, count=n_edges
+        ),
+        "speed_kph": np.fromiter(
+            (d["speed_kph"] for _, _, _, d in edges), dtype=np.float64, count=n_edges
+        ),
+        # highway is a short, low-cardinality label. simplified edges may
+        # carry a list of labels, which is kept as its string representation.
+        "highway": pd.Categorical(
+            [
+                str(h) if isinstance(h, list) else h
+                for h in (d.get("highway") for _, _, _, d in edges)
+            ]
+        ),
+        "bearing": np.fromiter(
+            (d.get("bearing", np.nan) for _, _, _, d in edges),
+            dtype=np.float64,
+            count=n_edges,
+        ),
+    }
+    if add_grade:
+        columns["grade"] = np.fromiter(
+            (d["grade"] for _, _, _, d in edges), dtype=np.float64, count=n_edges
+        )
+    columns.update(
+        _remaining_attributes(
+            [d for _, _, _, d in edges],
+            EDGE_ATTRIBUTES_WRITTEN + (("grade",) if add_grade else ()),
+        )
     )
+    columns["geometry"] = geometry
+    del edges
 
-    if add_grade:
-        e.grade.to_csv(
-            output_directory / "edges-grade-enumerated.txt.gz",
-            index=False,
-            header=False,
-        )
-
-    # COPY DEFAULT CONFIGURATION FILES
-    if default_config:
-        print("copying default configuration TOML files")
-        for filename in [
-            "osm_default_distance.toml",
-            "osm_default_speed.toml",
-            "osm_default_energy.toml",
-        ]:
-            init_toml_file = resource_filename(
-                "nrel.routee.compass.resources", filename
+    e = gpd.GeoDataFrame(columns, geometry="geometry", crs=g1.graph["crs"], copy=False)
+
+    compress = _resolve_compress(compress, len(e))
+    gz = ".gz" if compress else ""
+    csv_compression = GZ_FAST if compress else None
+
+    # WRITE NETWORK FILES
+    # the writes are independent and spend most of their time in zlib and
+    # file I/O, both of which release the GIL, so they are run concurrently.
+    output_directory.mkdir(parents=True, exist_ok=True)
+    model_output_directory = output_directory / "models"
+    model_output_directory.mkdir(exist_ok=True)
+
+    writes = []
+    with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as executor:
+        #   complete tables
+        print("writing vertex and edge tables")
+        writes.append(
+            executor.submit(
+                _write_table,
+                v,
+                output_directory,
+                "vertices-complete",
+                table_format,
+                compress,
+            )
+        )
+        writes.append(
+            executor.submit(
+                _write_table,
+                e,
+                output_directory,
+                "edges-complete",
+                table_format,
+                compress,
+            )
+        )
+
+        #   CSV and text files read by RouteE Compass
+        if legacy_outputs:
+            print("writing vertex files")
+            writes.append(
+                executor.submit(
+                    v[["vertex_id", "vertex_uuid"]].to_csv,
+                    output_directory / f"vertices-mapping.csv{gz}",
+                    index=False,
+                    compression=csv_compression,
+                    chunksize=CHUNK_ROWS,
+                )
+            )
+            writes.append(
+                executor.submit(
+                    _write_enumerated,
+                    output_directory / f"vertices-uuid-enumerated.txt{gz}",
+                    v.vertex_uuid,
+                )
+            )
+            writes.append(
+                executor.submit(
+                    v[["vertex_id", "x", "y"]].to_csv,
+                    output_directory / f"vertices-compass.csv{gz}",
+                    index=False,
+                    compression=csv_compression,
+                    chunksize=CHUNK_ROWS,
+                )
+            )
+
+            #   edge tables
+            print("writing edge files")
+            compass_cols = ["edge_id", "src_vertex_id", "dst_vertex_id", "distance"]
+            writes.append(
+                executor.submit(
+                    e[compass_cols].to_csv,
+                    output_directory / f"edges-compass.csv{gz}",
+                    index=False,
+                    compression=csv_compression,
+                    chunksize=CHUNK_ROWS,
+                )
+            )
+            writes.append(
+                executor.submit(
+                    e[["edge_id", "edge_uuid"]].to_csv,
+                    output_directory / f"edges-mapping.csv{gz}",
+                    index=False,
+                    compression=csv_compression,
+                    chunksize=CHUNK_ROWS,
+                )
+            )
+
+            #   edge tables (TXT)
+            print("writing edge attribute files")
+            writes.append(
+                executor.submit(
+                    _write_enumerated,
+                    output_directory / f"edges-uuid-enumerated.txt{gz}",
+                    e.edge_uuid,
+                )
             )
-            with open(init_toml_file, "r") as f:
-                init_toml = toml.loads(f.read())
+            writes.append(
+                executor.submit(
+                    _write_geometries,
+                    output_directory / f"edges-geometries-enumerated.txt{gz}",
+                    e.geometry,
+                )
+            )
+            writes.append(
+                executor.submit(
+                    _write_enumerated,
+                    output_directory / f"edges-posted-speed-enumerated.txt{gz}",
+                    e.speed_kph,
+                )
+            )
+            writes.append(
+                executor.submit(
+                    _write_enumerated,
+                    output_directory / f"edges-road-class-enumerated.txt{gz}",
+                    e.highway,
+                )
+            )
+
+            # np.rint rounds half to even, as Python's round did
+            headings_df = pd.DataFrame(
+                {"arrival_heading": np.rint(e.bearing.fillna(0)).astype(np.int32)}
+            )
+
+            # We could get more sophisticated and compute the end heading
+            # for links that might have some significant curvature, but
+            # for now we'll just use the start heading.
+            headings_df["departure_heading"] = None
+            writes.append(
+                executor.submit(
+                    headings_df.to_csv,
+                    output_directory / f"edges-headings-enumerated.csv{gz}",
+                    index=False,
+                    compression=csv_compression,
+                    chunksize=CHUNK_ROWS,
+                )
+            )
+
+            if add_grade:
+                writes.append(
+                    executor.submit(
+                        _write_enumerated,
+                        output_directory / f"edges-grade-enumerated.txt{gz}",
+                        e.grade,
+                    )
+                )
+
+        # COPY ROUTEE ENERGY MODEL CATALOG
+        print("copying RouteE Powertrain models")
+        writes.append(executor.submit(_copy_models, model_output_directory))
+
+        # COPY DEFAULT CONFIGURATION FILES
+        if default_config:
+            print("copying default configuration TOML files")
+            for filename in CONFIG_TEMPLATES:
+                init_toml = copy.deepcopy(_load_config_template(filename))
                 if filename == "osm_default_energy.toml":
                     if add_grade:
                         init_toml["traversal"][
                             "grade_table_input_input_file"
                         ] = "edges-grade-enumerated.txt.gz"
                         init_toml["traversal"]["grade_table_grade_unit"] = "decimal"
-            with open(output_directory / filename, "w") as f:
-                f.write(toml.dumps(init_toml))
+                if not compress:
+                    init_toml = _drop_gz_suffix(init_toml)
+                with open(output_directory / filename, "w") as f:
+                    f.write(_toml.dumps(init_toml))
 
-    # COPY ROUTEE ENERGY MODEL CATALOG
-    print("copying RouteE Powertrain models")
-    model_directory = importlib.resources.files("nrel.routee.compass.resources.models")
-    model_output_directory = output_directory / "models"
-    if not model_output_directory.exists():
-        model_output_directory.mkdir(exist_ok=True)
-    for model_file in model_directory.iterdir():
-        if not model_file.name.endswith(".bin"):
-            continue
-        if model_file.is_file():
-            with importlib.resources.as_file(model_file) as model_path:
-                model_dst = model_output_directory / model_path.name
-                shutil.copy(model_path, model_dst)
+    # surface any exception raised by a write
+    for write in writes:
+        write.result()
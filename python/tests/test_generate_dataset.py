@@ -0,0 +1,247 @@
+import copy
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipIf
+
+from nrel.routee.compass.io import generate_dataset
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = pd = None  # type: ignore
+
+try:
+    import networkx as nx
+    import osmnx as ox
+    from shapely.geometry import LineString
+except ImportError:
+    ox = None  # type: ignore
+
+LEGACY_FILES = [
+    "vertices-mapping.csv",
+    "vertices-uuid-enumerated.txt",
+    "vertices-compass.csv",
+    "edges-compass.csv",
+    "edges-mapping.csv",
+    "edges-uuid-enumerated.txt",
+    "edges-geometries-enumerated.txt",
+    "edges-posted-speed-enumerated.txt",
+    "edges-road-class-enumerated.txt",
+    "edges-headings-enumerated.csv",
+]
+
+
+def small_graph(n: int = 5, node_id=lambda i: 1000 + 7 * i):
+    """
+    a grid graph shaped like an osmnx download, with parallel edges, edges
+    with and without geometry, list-valued osmid and highway, an attribute
+    on only some edges and preexisting grades.
+    """
+    g = nx.MultiDiGraph(crs="epsg:4326")
+    for i in range(n * n):
+        g.add_node(
+            node_id(i),
+            x=-105 + (i % n) * 0.001,
+            y=39.7 + (i // n) * 0.001,
+            street_count=3,
+        )
+    for i in range(n * n):
+        for j in (i + 1, i + n):
+            if j >= n * n or (j == i + 1 and j % n == 0):
+                continue
+            for a, b in ((i, j), (j, i)):
+                u, v = node_id(a), node_id(b)
+                d = {
+                    "osmid": 5000 + 11 * a + b,
+                    "length": 50.0 + (7 * a + 3 * b) % 100 + 1 / 3,
+                    "highway": "residential" if a % 3 else "primary",
+                    "oneway": False,
+                    "grade": (a - b) / 1000,
+                    "grade_abs": abs(a - b) / 1000,
+                }
+                if a % 4 == 0:
+                    d["osmid"] = [d["osmid"], d["osmid"] + 1]
+                    d["highway"] = ["residential", "tertiary"]
+                if a % 5 == 0:
+                    d["maxspeed"] = "40"
+                if a % 2 == 0:
+                    nu, nv = g.nodes[u], g.nodes[v]
+                    mid = ((nu["x"] + nv["x"]) / 2, (nu["y"] + nv["y"]) / 2 + 1e-5)
+                    d["geometry"] = LineString(
+                        [(nu["x"], nu["y"]), mid, (nv["x"], nv["y"])]
+                    )
+                g.add_edge(u, v, **d)
+    g.add_edge(
+        node_id(0), node_id(1), osmid=1, length=200.0, highway="residential", grade=0.0
+    )
+    return g
+
+
+def write_reference_dataset(g, output_directory: Path):
+    """
+    writes the complete tables and legacy files as generate_compass_dataset
+    did with ox.graph_to_gdfs, uncompressed.
+    """
+    g1 = ox.truncate.largest_component(g)
+    g1 = ox.add_edge_speeds(g1)
+    g1 = ox.add_edge_bearings(g1)
+    v, e = ox.graph_to_gdfs(g1)
+
+    v = v.reset_index(drop=False).rename(columns={"osmid": "vertex_uuid"})
+    v["vertex_id"] = range(len(v))
+    lookup = v.set_index("vertex_uuid").vertex_id
+    e = e.reset_index(drop=False).rename(
+        columns={
+            "u": "src_vertex_uuid",
+            "v": "dst_vertex_uuid",
+            "osmid": "edge_uuid",
+            "length": "distance",
+        }
+    )
+    e = e[e["key"] == 0]
+    e["edge_id"] = range(len(e))
+    e["src_vertex_id"] = e.src_vertex_uuid.map(lookup)
+    e["dst_vertex_id"] = e.dst_vertex_uuid.map(lookup)
+
+    output_directory.mkdir()
+    v.to_csv(output_directory / "vertices-complete.csv", index=False)
+    e.to_csv(output_directory / "edges-complete.csv", index=False)
+    v[["vertex_id", "vertex_uuid"]].to_csv(
+        output_directory / "vertices-mapping.csv", index=False
+    )
+    v[["vertex_uuid"]].to_csv(
+        output_directory / "vertices-uuid-enumerated.txt", index=False, header=False
+    )
+    v[["vertex_id", "x", "y"]].to_csv(
+        output_directory / "vertices-compass.csv", index=False
+    )
+    compass_cols = ["edge_id", "src_vertex_id", "dst_vertex_id", "distance"]
+    e[compass_cols].to_csv(output_directory / "edges-compass.csv", index=False)
+    e[["edge_id", "edge_uuid"]].to_csv(
+        output_directory / "edges-mapping.csv", index=False
+    )
+    e.edge_uuid.to_csv(
+        output_directory / "edges-uuid-enumerated.txt", index=False, header=False
+    )
+    np.savetxt(
+        output_directory / "edges-geometries-enumerated.txt", e.geometry, fmt="%s"
+    )
+    e.speed_kph.to_csv(
+        output_directory / "edges-posted-speed-enumerated.txt",
+        index=False,
+        header=False,
+    )
+    e.highway.to_csv(
+        output_directory / "edges-road-class-enumerated.txt",
+        index=False,
+        header=False,
+    )
+    headings_df = (
+        e.bearing.fillna(0)
+        .apply(lambda x: int(round(x)))
+        .to_frame(name="arrival_heading")
+    )
+    headings_df["departure_heading"] = None
+    headings_df.to_csv(output_directory / "edges-headings-enumerated.csv", index=False)
+
+
+@skipIf(pd is None, "requires numpy and pandas")
+class TestWriteEnumerated(TestCase):
+    def assert_matches_to_csv(self, series):
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "enumerated.txt"
+            generate_dataset._write_enumerated(path, series)
+            expected = series.to_csv(index=False, header=False)
+            self.assertEqual(path.read_text(), expected)
+
+    def test_int(self):
+        self.assert_matches_to_csv(pd.Series([3, -1, 0, 2**40], dtype=np.int64))
+
+    def test_float_with_nan(self):
+        self.assert_matches_to_csv(pd.Series([40.0, np.nan, 0.1, 1 / 3, 1e-20, 88.5]))
+
+    def test_categorical_with_missing_and_list_label(self):
+        highway = ["residential", None, str(["residential", "tertiary"]), "primary"]
+        self.assert_matches_to_csv(pd.Series(pd.Categorical(highway)))
+
+    def test_mixed_object(self):
+        self.assert_matches_to_csv(
+            pd.Series([5001, [5002, 5003], None, "way, with comma"], dtype=object)
+        )
+
+
+class TestCompressedOutputs(TestCase):
+    def test_compress_threshold(self):
+        threshold = generate_dataset.COMPRESS_MIN_EDGES
+        self.assertFalse(generate_dataset._resolve_compress(None, threshold))
+        self.assertTrue(generate_dataset._resolve_compress(None, threshold + 1))
+        self.assertTrue(generate_dataset._resolve_compress(True, 10))
+        self.assertFalse(generate_dataset._resolve_compress(False, threshold + 1))
+
+    @skipIf(pd is None, "requires numpy and pandas")
+    def test_csv_table_suffix(self):
+        df = pd.DataFrame({"vertex_id": [0, 1]})
+        for compress, name in [(False, "t.csv"), (True, "t.csv.gz")]:
+            with TemporaryDirectory() as tmp:
+                generate_dataset._write_table(df, Path(tmp), "t", "csv", compress)
+                self.assertEqual([p.name for p in Path(tmp).iterdir()], [name])
+
+    def test_drop_gz_suffix(self):
+        config = {
+            "graph": {
+                "edge_list_input_file": "edges-compass.csv.gz",
+                "verbose": True,
+            },
+            "traversal": {"type": "energy_model", "label": "archive.gz"},
+            "plugin": {
+                "input_plugins": [
+                    {"type": "vertex_rtree", "vertices_input_file": "v.csv.gz"},
+                ],
+            },
+            "parallelism": 2,
+        }
+        expected = copy.deepcopy(config)
+        expected["graph"]["edge_list_input_file"] = "edges-compass.csv"
+        expected["plugin"]["input_plugins"][0]["vertices_input_file"] = "v.csv"
+
+        self.assertEqual(generate_dataset._drop_gz_suffix(config), expected)
+        self.assertEqual(
+            config["graph"]["edge_list_input_file"], "edges-compass.csv.gz"
+        )
+
+
+@skipIf(ox is None, "requires osmnx")
+class TestGenerateCompassDataset(TestCase):
+    def test_matches_graph_to_gdfs(self):
+        self.assert_matches_reference(small_graph())
+
+    def test_non_integer_node_ids(self):
+        self.assert_matches_reference(small_graph(node_id=lambda i: f"n{i}"))
+
+    def assert_matches_reference(self, g):
+        with TemporaryDirectory() as tmp:
+            expected_dir, actual_dir = Path(tmp) / "expected", Path(tmp) / "actual"
+            write_reference_dataset(g, expected_dir)
+            generate_dataset.generate_compass_dataset(
+                g,
+                actual_dir,
+                table_format="csv",
+                compress=False,
+                default_config=False,
+            )
+
+            for name in ["vertices-complete.csv", "edges-complete.csv"]:
+                expected = pd.read_csv(expected_dir / name)
+                actual = pd.read_csv(actual_dir / name)
+                self.assertEqual(set(actual.columns), set(expected.columns), name)
+                pd.testing.assert_frame_equal(
+                    actual[expected.columns], expected, check_dtype=False
+                )
+
+            for name in LEGACY_FILES:
+                self.assertEqual(
+                    (actual_dir / name).read_bytes(),
+                    (expected_dir / name).read_bytes(),
+                    name,
+                )
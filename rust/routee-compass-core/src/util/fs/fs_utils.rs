@@ -4,7 +4,7 @@ use std::{
     path::Path,
 };
 
-use flate2::read::GzDecoder;
+use flate2::read::{GzDecoder, MultiGzDecoder};
 
 /// The output is wrapped in a Result to allow matching on errors
 /// Returns an Iterator to the Reader of the lines of the file.
@@ -17,7 +17,7 @@ where
     let file = File::open(filename)?;
 
     if is_gzip {
-        let reader = BufReader::new(GzDecoder::new(file));
+        let reader = BufReader::new(MultiGzDecoder::new(file));
         Ok(reader.lines().count())
     } else {
         let reader = BufReader::new(file);
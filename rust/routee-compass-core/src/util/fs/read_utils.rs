@@ -1,6 +1,6 @@
 use super::fs_utils;
 use csv::ReaderBuilder;
-use flate2::read::GzDecoder;
+use flate2::read::MultiGzDecoder;
 
 use std::{
     fs::File,
@@ -25,7 +25,7 @@ where
 {
     let f = File::open(filepath.as_ref())?;
     let r: Box<dyn io::Read> = if fs_utils::is_gzip(filepath) {
-        Box::new(BufReader::new(GzDecoder::new(f)))
+        Box::new(BufReader::new(MultiGzDecoder::new(f)))
     } else {
         Box::new(f)
     };
@@ -120,7 +120,7 @@ where
 {
     let file = File::open(filepath)?;
     let mut result = vec![];
-    let reader = BufReader::new(GzDecoder::new(file));
+    let reader = BufReader::new(MultiGzDecoder::new(file));
     for (idx, row) in reader.lines().enumerate() {
         let parsed = row?;
         let deserialized = op(idx, parsed)?;
@@ -187,4 +187,28 @@ mod tests {
             "result should include each row from the source file along with the bonus word"
         );
     }
+
+    #[test]
+    fn test_read_raw_file_multi_member_gzip() {
+        let filepath = PathBuf::from(env!("CARGO_MANIFEST_DIR"))
+            .join("src")
+            .join("util")
+            .join("fs")
+            .join("test")
+            .join("test-multi-member.txt.gz");
+        println!("loading file {:?}", filepath);
+        let op = |_idx: usize, row: String| Ok(row);
+        let result = read_raw_file(&filepath, op, None).unwrap();
+        let expected = vec![
+            String::from("RouteE"),
+            String::from("FASTSim"),
+            String::from("HIVE"),
+            String::from("ADOPT"),
+        ]
+        .into_boxed_slice();
+        assert_eq!(
+            result, expected,
+            "result should include the rows from every gzip member of the source file"
+        );
+    }
 }